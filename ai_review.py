@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 import argparse
+import heapq
 import os
 import sys
 from typing import Optional
 
 from review_agent import __version__
+from review_agent.cache import DEFAULT_CACHE_DIR, ScanCache
 from review_agent.config import load_scan_config, resolve_loaded_config_path
-from review_agent.report_md import render_markdown
+from review_agent.report_md import iter_markdown
 from review_agent.scanner import scan_codebase
 
 
@@ -16,22 +18,35 @@ def _die(msg: str, code: int = 2) -> None:
 
 
 def cmd_scan(args: argparse.Namespace) -> int:
-    root = args.path
-    if not os.path.exists(root):
-        _die(f"Path not found: {root}")
-    root = os.path.abspath(root)
+    root = os.path.abspath(args.path)
 
     loaded_config_path: Optional[str] = resolve_loaded_config_path(args.config)
     config = load_scan_config(root=root, config_path=args.config)
 
-    summary = scan_codebase(config=config, config_path=loaded_config_path)
-    md = render_markdown(summary)
+    cache: Optional[ScanCache] = None
+    if not args.no_cache:
+        cache = ScanCache.load(args.cache_dir, root)
+
+    # The walker lists root first, so a missing root fails before any file is read.
+    try:
+        summary = scan_codebase(config=config, config_path=loaded_config_path, cache=cache, jobs=args.jobs)
+    except FileNotFoundError:
+        _die(f"Path not found: {args.path}")
+    except OSError as e:
+        _die(f"Cannot scan {args.path}: {e}")
+
+    if cache is not None:
+        try:
+            cache.save()
+        except OSError as e:
+            # The cache only speeds up the next run; never fail the scan over it.
+            print(f"WARNING: Cannot write scan cache {cache.path}: {e}", file=sys.stderr)
 
     out_path = os.path.abspath(args.out)
     try:
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(md)
-            f.write("\n")
+        # Stream the report through a large write buffer instead of building it in memory.
+        with open(out_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.writelines(line + "\n" for line in iter_markdown(summary))
     except OSError as e:
         _die(f"Cannot write report to {out_path}: {e}")
 
@@ -48,10 +63,9 @@ def cmd_scan(args: argparse.Namespace) -> int:
         print(f"report: {out_path}")
         print("")
         print("Top rules by occurrences:")
-        for rid, occ in sorted(summary.rule_occurrences.items(), key=lambda x: (-x[1], x[0]))[:5]:
-            if occ <= 0:
-                continue
-            print(f"- {rid}: {occ} (files: {summary.rule_files.get(rid, 0)})")
+        top_rules = heapq.nsmallest(5, [(-occ, rid) for rid, occ in summary.rule_occurrences.items() if occ > 0])
+        for neg_occ, rid in top_rules:
+            print(f"- {rid}: {-neg_occ} (files: {summary.rule_files.get(rid, 0)})")
 
     return 0
 
@@ -68,6 +82,18 @@ def build_parser() -> argparse.ArgumentParser:
     scan.add_argument("--config", default=None, help="INI config path (default: ./ai_review.ini if present).")
     scan.add_argument("--out", default="ai_review_report.md", help="Output Markdown report path.")
     scan.add_argument("--quiet", action="store_true", help="Reduce stdout output (still writes report).")
+    scan.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Per-file result cache directory for faster re-scans (default: ./{DEFAULT_CACHE_DIR}).",
+    )
+    scan.add_argument("--no-cache", action="store_true", help="Do not read or write the scan cache.")
+    scan.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Worker processes for scanning (default: number of usable CPUs; 1 = scan in-process).",
+    )
     scan.set_defaults(func=cmd_scan)
 
     return p
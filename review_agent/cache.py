@@ -0,0 +1,109 @@
+"""
+On-disk cache of per-file rule counts, for fast incremental re-scans.
+
+Entries are keyed by posix relpath and validated by (mtime_ns, size) first, then by a BLAKE2b
+digest of the file content. The whole cache is discarded when the ruleset, tool version or
+Python version changes.
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+import platform
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from . import __version__
+from .rules import minimal_ruleset
+
+DEFAULT_CACHE_DIR = ".ai_review_cache"
+
+_CACHE_FORMAT = 2
+
+# relpath -> (mtime_ns, size, content digest, counts indexed by rule number)
+_Entry = Tuple[int, int, bytes, List[int]]
+
+
+def content_digest(data: Union[bytes, mmap.mmap]) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def ruleset_digest() -> str:
+    """
+    Identifies everything that affects per-file counts: rule order, ids and regexes,
+    plus the tool and Python versions (the latter covers regex engine changes).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{_CACHE_FORMAT}|{__version__}|{platform.python_version()}".encode("utf-8"))
+    for r in minimal_ruleset():
+        h.update(b"||" + r.id.encode("utf-8"))
+        for rx in r.regexes:
+            h.update(b"|" + rx.pattern)
+    return h.hexdigest()
+
+
+class ScanCache:
+    def __init__(self, path: str, key: str, entries: Optional[Dict[str, _Entry]] = None) -> None:
+        self.path = path
+        self.key = key
+        self._old: Dict[str, _Entry] = entries or {}
+        # Only entries seen during this scan are saved, so deleted files drop out.
+        self._new: Dict[str, _Entry] = {}
+
+    @classmethod
+    def load(cls, cache_dir: str, root: str) -> "ScanCache":
+        """
+        Load the cache for scan root `root` from `cache_dir`; start empty if it is missing,
+        unreadable or was written for a different ruleset.
+        """
+        root_id = hashlib.blake2b(os.path.abspath(root).encode("utf-8"), digest_size=8).hexdigest()
+        path = os.path.join(os.path.abspath(cache_dir), f"scan-{root_id}.pickle")
+        key = ruleset_digest()
+        entries: Optional[Dict[str, _Entry]] = None
+        try:
+            with open(path, "rb") as f:
+                stored_key, stored_entries = pickle.load(f)
+            if stored_key == key:
+                entries = stored_entries
+        except Exception:
+            entries = None
+        return cls(path, key, entries)
+
+    def lookup_stat(self, relpath: str, mtime_ns: int, size: int) -> Optional[List[int]]:
+        """
+        Cached counts if the file's (mtime_ns, size) is unchanged; the file need not be read.
+        """
+        e = self._old.get(relpath)
+        if e is None or e[0] != mtime_ns or e[1] != size:
+            return None
+        self._new[relpath] = e
+        return e[3]
+
+    def digest(self, relpath: str) -> Optional[bytes]:
+        """
+        Content digest cached for `relpath`, if any.
+        """
+        e = self._old.get(relpath)
+        return None if e is None else e[2]
+
+    def lookup_digest(self, relpath: str, digest: bytes) -> Optional[List[int]]:
+        """
+        Cached counts if the content is unchanged (e.g. the file was only touched).
+        """
+        e = self._old.get(relpath)
+        if e is None or e[2] != digest:
+            return None
+        return e[3]
+
+    def store(self, relpath: str, mtime_ns: int, size: int, digest: bytes, counts: Sequence[int]) -> None:
+        self._new[relpath] = (mtime_ns, size, digest, list(counts))
+
+    def save(self) -> None:
+        """
+        Write the entries seen during this scan (atomically replacing the previous cache file).
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((self.key, self._new), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
@@ -1,5 +1,6 @@
 import configparser
 import os
+import re
 from typing import List, Optional
 
 from .types import ScanConfig
@@ -43,17 +44,12 @@ DEFAULT_CRITICAL_DIRS = [
 
 DEFAULT_TOP_N_DIRS = 15
 DEFAULT_HOTSPOT_DEPTH = 3
+DEFAULT_MAX_FILE_BYTES = 2_000_000
 
 
 def _dedupe_keep_order(items: List[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for x in items:
-        if x in seen:
-            continue
-        seen.add(x)
-        out.append(x)
-    return out
+    # dicts preserve insertion order; the hashing loop runs in C.
+    return list(dict.fromkeys(items))
 
 
 def _split_multiline_values(raw: str) -> List[str]:
@@ -66,13 +62,13 @@ def _split_multiline_values(raw: str) -> List[str]:
     return items
 
 
+_LEAD_DOTSLASH = re.compile(r"^(?:\./)+")
+
+
 def _normalize_posix_path(p: str) -> str:
-    p = (p or "").strip()
-    p = p.replace("\\", "/")
-    # Remove leading "./"
-    while p.startswith("./"):
-        p = p[2:]
-    return p.strip("/")
+    p = (p or "").strip().replace("\\", "/")
+    # Remove leading "./" (any number of them)
+    return _LEAD_DOTSLASH.sub("", p).strip("/")
 
 
 def load_scan_config(root: str, config_path: Optional[str]) -> ScanConfig:
@@ -99,7 +95,7 @@ def load_scan_config(root: str, config_path: Optional[str]) -> ScanConfig:
     exclude_globs: List[str] = list(DEFAULT_EXCLUDE_DIR_GLOBS)
     if cp.has_option("scan", "exclude_dir_globs"):
         exclude_globs.extend(_split_multiline_values(cp.get("scan", "exclude_dir_globs")))
-    exclude_globs = [_normalize_posix_path(g) for g in exclude_globs if _normalize_posix_path(g)]
+    exclude_globs = [g for g in map(_normalize_posix_path, exclude_globs) if g]
     # Backward compatibility / operator convenience:
     # If the scan root itself is "platform/", users often (incorrectly) prefix
     # excludes with "platform/..." even though matching is relative to root.
@@ -118,7 +114,7 @@ def load_scan_config(root: str, config_path: Optional[str]) -> ScanConfig:
     critical_dirs: List[str] = []
     if cp.has_option("critical_dirs", "paths"):
         critical_dirs = _split_multiline_values(cp.get("critical_dirs", "paths"))
-    critical_dirs = [_normalize_posix_path(p) for p in critical_dirs if _normalize_posix_path(p)]
+    critical_dirs = [p for p in map(_normalize_posix_path, critical_dirs) if p]
     if not critical_dirs:
         critical_dirs = list(DEFAULT_CRITICAL_DIRS)
     critical_dirs = _dedupe_keep_order(critical_dirs)
@@ -142,12 +138,22 @@ def load_scan_config(root: str, config_path: Optional[str]) -> ScanConfig:
     if hotspot_depth <= 0:
         hotspot_depth = DEFAULT_HOTSPOT_DEPTH
 
+    max_file_bytes = DEFAULT_MAX_FILE_BYTES
+    if cp.has_option("scan", "max_file_bytes"):
+        try:
+            max_file_bytes = int(cp.get("scan", "max_file_bytes").strip())
+        except ValueError:
+            max_file_bytes = DEFAULT_MAX_FILE_BYTES
+    if max_file_bytes <= 0:
+        max_file_bytes = DEFAULT_MAX_FILE_BYTES
+
     return ScanConfig(
         root=root,
         exclude_dir_globs=exclude_globs,
         critical_dirs=critical_dirs,
         top_n_dirs=top_n_dirs,
         hotspot_depth=hotspot_depth,
+        max_file_bytes=max_file_bytes,
     )
 
 
@@ -0,0 +1,123 @@
+import fnmatch
+import os
+import re
+from typing import FrozenSet, List, Optional, Pattern, Set, Tuple
+
+
+def compile_exclude_globs(globs: List[str]) -> Pattern[str]:
+    """
+    Translate exclude globs into a single regex, matched with .match() against posix paths
+    relative to the scan root (directories are passed with a trailing "/").
+
+    Semantics follow fnmatch (`*` also matches "/"), plus two conveniences:
+    - a leading "**/" is optional, so "**/.git/**" also matches ".git/...";
+    - "dir/**" also matches "dir" itself.
+    fnmatch.translate() already guards against pathological backtracking on runs of "*".
+    """
+    parts: List[str] = []
+    for g in globs:
+        parts.append(fnmatch.translate(g))
+        if g.startswith("**/"):
+            parts.append(fnmatch.translate(g[len("**/") :]))
+        if g.endswith("/**"):
+            parts.append(re.escape(g[:-3].strip("/")) + r"\Z")
+    if not parts:
+        return re.compile(r"(?!)")
+    # fnmatch.fnmatch() is case-insensitive where the OS is (os.path.normcase), e.g. Windows.
+    flags = 0 if os.path.normcase("A") == "A" else re.IGNORECASE
+    return re.compile("|".join(parts), flags)
+
+
+def _has_wildcard(g: str) -> bool:
+    return any(ch in g for ch in "*?[")
+
+
+class ExcludeMatcher:
+    """
+    Exclude globs split into cheap string checks, with a regex only for the remainder.
+
+    Tried in order against a posix path relative to the scan root:
+    - exact: globs without wildcards, plus DIR for every "DIR/**";
+    - prefixes: "DIR/**" -> anything below DIR (str.startswith);
+    - names: "**/NAME/**" -> a directory named NAME at any depth (set membership);
+    - regex: all other globs, via compile_exclude_globs().
+    Matches exactly what compile_exclude_globs() would for the full list.
+    """
+
+    __slots__ = ("exact", "prefixes", "names", "regex", "_fold", "_file_exact", "_file_regex")
+
+    def __init__(self, globs: List[str]) -> None:
+        self._fold = os.path.normcase("A") != "A"
+        exact: Set[str] = set()
+        prefixes: List[str] = []
+        names: Set[str] = set()
+        rest: List[str] = []
+        for g in globs:
+            key = g.lower() if self._fold else g
+            if g.startswith("**/") and g.endswith("/**"):
+                name = key[len("**/") : -len("/**")]
+                if name and "/" not in name and not _has_wildcard(name):
+                    names.add(name)
+                    continue
+            elif g.endswith("/**"):
+                base = key[: -len("/**")]
+                if base and not _has_wildcard(base):
+                    exact.add(base)
+                    prefixes.append(base + "/")
+                    continue
+            elif not _has_wildcard(g):
+                exact.add(key)
+                continue
+            rest.append(g)
+        self.exact: FrozenSet[str] = frozenset(exact)
+        self.prefixes: Tuple[str, ...] = tuple(prefixes)
+        self.names: FrozenSet[str] = frozenset(names)
+        self.regex: Optional[Pattern[str]] = compile_exclude_globs(rest) if rest else None
+
+        # For matches_file(): a glob ending in "/**" matches a file only if it also matches one of
+        # the file's directories, except for its "DIR/**" -> "DIR" convenience form.
+        file_exact = set(exact)
+        file_globs: List[str] = []
+        for g in rest:
+            if g.endswith("/**"):
+                file_exact.add((g.lower() if self._fold else g)[: -len("/**")].strip("/"))
+            else:
+                file_globs.append(g)
+        self._file_exact: FrozenSet[str] = frozenset(file_exact)
+        self._file_regex: Optional[Pattern[str]] = compile_exclude_globs(file_globs) if file_globs else None
+
+    def matches(self, posix_path: str) -> bool:
+        p = posix_path.lower() if self._fold else posix_path
+        # Directory segments only: the last element is "" for "dir/" paths, a file name otherwise.
+        if self.names and not self.names.isdisjoint(p.split("/")[:-1]):
+            return True
+        return self._matches_globs(p)
+
+    def matches_subdir(self, parent: str, name: str) -> bool:
+        """
+        Same as matches(parent + name + "/"), for a directory whose ancestors did not match (as in
+        a top-down walk): only `name` itself can hit a "**/NAME/**" glob, a single set lookup.
+        """
+        p = parent + name + "/"
+        if self._fold:
+            name = name.lower()
+            p = p.lower()
+        return name in self.names or self._matches_globs(p)
+
+    def matches_file(self, relpath: str) -> bool:
+        """
+        Same as matches(relpath), for a file none of whose directories matched (as yielded by a
+        pruning walk). Only file-level globs can still hit; with the default excludes that is a
+        single set lookup.
+        """
+        p = relpath.lower() if self._fold else relpath
+        if p in self._file_exact:
+            return True
+        return self._file_regex is not None and self._file_regex.match(p) is not None
+
+    def _matches_globs(self, p: str) -> bool:
+        if p in self.exact:
+            return True
+        if self.prefixes and p.startswith(self.prefixes):
+            return True
+        return self.regex is not None and self.regex.match(p) is not None
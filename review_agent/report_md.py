@@ -1,99 +1,109 @@
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Tuple
 
-from .rules import minimal_ruleset
+from .rules import CATS, DESCS, RID_TO_IDX, SEVS
 from .types import ScanSummary
 
 
 def _md_table(headers: List[str], rows: List[List[str]]) -> str:
-    out: List[str] = []
-    out.append("| " + " | ".join(headers) + " |")
-    out.append("| " + " | ".join(["---"] * len(headers)) + " |")
-    for r in rows:
-        out.append("| " + " | ".join(r) + " |")
-    return "\n".join(out)
-
-
-def render_markdown(summary: ScanSummary) -> str:
-    rules = minimal_ruleset()
-    rule_meta: Dict[str, tuple] = {r.id: (r.category, r.severity, r.description) for r in rules}
-
-    lines: List[str] = []
-    lines.append("# Hawthorn Offline Code Risk Scan Report (Text Rules Baseline)")
-    lines.append("")
-    lines.append("## Scan metadata")
-    lines.append("")
-    lines.append(f"- **version**: `{summary.tool_version}`")
-    lines.append(f"- **python**: `{summary.python_version}`")
-    lines.append(f"- **root**: `{summary.root}`")
-    lines.append(f"- **config**: `{summary.config_path or '(built-in defaults)'}`")
-    lines.append(f"- **started**: `{summary.started_at_iso}`")
-    lines.append(f"- **finished**: `{summary.finished_at_iso}`")
-    lines.append(f"- **hotspot_depth**: `{summary.hotspot_depth}`")
-    lines.append(f"- **top_n_dirs**: `{summary.top_n_dirs}`")
-    lines.append("")
-
-    lines.append("## Scan statistics")
-    lines.append("")
+    head = "| " + " | ".join(headers) + " |\n| " + " | ".join(["---"] * len(headers)) + " |"
+    if not rows:
+        return head
+    # Cells are joined per row, then all rows in one join (row separators included).
+    return head + "\n| " + " |\n| ".join([" | ".join(r) for r in rows]) + " |"
+
+
+def _by_count_desc(counts: Dict[str, int]) -> List[Tuple[str, int]]:
+    # Highest count first, ties by key. Sorting pre-keyed (-count, key) tuples compares in C;
+    # a key= lambda would cost a Python call per element.
+    keyed = [(-occ, k) for k, occ in counts.items()]
+    keyed.sort()
+    return [(k, -neg) for neg, k in keyed]
+
+
+def iter_markdown(summary: ScanSummary) -> Iterator[str]:
+    """
+    Yield the report line by line (tables as one multi-line string), without a trailing newline.
+
+    Lets callers stream the report to a file instead of holding it all in memory.
+    """
+    yield "# Hawthorn Offline Code Risk Scan Report (Text Rules Baseline)"
+    yield ""
+    yield "## Scan metadata"
+    yield ""
+    yield f"- **version**: `{summary.tool_version}`"
+    yield f"- **python**: `{summary.python_version}`"
+    yield f"- **root**: `{summary.root}`"
+    yield f"- **config**: `{summary.config_path or '(built-in defaults)'}`"
+    yield f"- **started**: `{summary.started_at_iso}`"
+    yield f"- **finished**: `{summary.finished_at_iso}`"
+    yield f"- **hotspot_depth**: `{summary.hotspot_depth}`"
+    yield f"- **top_n_dirs**: `{summary.top_n_dirs}`"
+    yield ""
+
+    yield "## Scan statistics"
+    yield ""
     total_hits = sum(summary.rule_occurrences.values())
-    lines.append(
-        _md_table(
-            ["Metric", "Value"],
-            [
-                ["Python files scanned", str(summary.scanned_files)],
-                ["Directories pruned (excluded)", str(getattr(summary, "pruned_dirs", 0))],
-                ["Files skipped (file-level exclude)", str(summary.skipped_files)],
-                ["Read errors", str(summary.read_errors)],
-                ["Total hits (all rules)", str(total_hits)],
-            ],
-        )
+    yield _md_table(
+        ["Metric", "Value"],
+        [
+            ["Python files scanned", str(summary.scanned_files)],
+            ["Directories pruned (excluded)", str(getattr(summary, "pruned_dirs", 0))],
+            ["Files skipped (file-level exclude, too large or binary)", str(summary.skipped_files)],
+            ["Read errors", str(summary.read_errors)],
+            ["Total hits (all rules)", str(total_hits)],
+        ],
     )
-    lines.append("")
+    yield ""
 
-    lines.append("## Critical directories (auto-detected)")
-    lines.append("")
+    yield "## Critical directories (auto-detected)"
+    yield ""
     if summary.critical_dirs_detected:
-        lines.append(
+        yield (
             "- **detected**: "
             + ", ".join(f"`{p}/`" for p in summary.critical_dirs_detected)
             + ", `other`"
         )
     else:
-        lines.append(
+        yield (
             "- **detected**: (No default critical directories found under root; all files are categorized as `other`.)"
         )
-    lines.append("")
+    yield ""
 
-    lines.append("## Rule hit overview (aggregated by rule)")
-    lines.append("")
+    yield "## Rule hit overview (aggregated by rule)"
+    yield ""
     rows: List[List[str]] = []
-    for rid, occ in sorted(summary.rule_occurrences.items(), key=lambda x: (-x[1], x[0])):
-        cat, sev, desc = rule_meta.get(rid, ("?", "?", ""))
+    for rid, occ in _by_count_desc(summary.rule_occurrences):
+        idx = RID_TO_IDX.get(rid)
+        if idx is None:
+            cat, sev, desc = "?", "?", ""
+        else:
+            cat, sev, desc = CATS[idx], SEVS[idx], DESCS[idx]
         rows.append([rid, cat, sev, str(occ), str(summary.rule_files.get(rid, 0)), desc])
-    lines.append(_md_table(["rule_id", "category", "severity", "occurrences", "files", "description"], rows))
-    lines.append("")
+    yield _md_table(["rule_id", "category", "severity", "occurrences", "files", "description"], rows)
+    yield ""
 
-    lines.append("## Rollups (by category / severity)")
-    lines.append("")
+    yield "## Rollups (by category / severity)"
+    yield ""
     cat_rows: List[List[str]] = []
-    for cat, occ in sorted(summary.category_occurrences.items(), key=lambda x: (-x[1], x[0])):
+    for cat, occ in _by_count_desc(summary.category_occurrences):
         cat_rows.append([cat, str(occ), str(summary.category_files.get(cat, 0))])
     if cat_rows:
-        lines.append(_md_table(["category", "occurrences", "files"], cat_rows))
+        yield _md_table(["category", "occurrences", "files"], cat_rows)
     else:
-        lines.append("(No data.)")
-    lines.append("")
+        yield "(No data.)"
+    yield ""
 
     sev_rows: List[List[str]] = []
-    for sev, occ in sorted(summary.severity_occurrences.items(), key=lambda x: (-x[1], x[0])):
+    for sev, occ in _by_count_desc(summary.severity_occurrences):
         sev_rows.append([sev, str(occ), str(summary.severity_files.get(sev, 0))])
     if sev_rows:
-        lines.append(_md_table(["severity", "occurrences", "files"], sev_rows))
+        yield _md_table(["severity", "occurrences", "files"], sev_rows)
     else:
-        lines.append("(No data.)")
-    lines.append("")
+        yield "(No data.)"
+    yield ""
 
-    lines.append("## Hit distribution (by critical directory)")
-    lines.append("")
+    yield "## Hit distribution (by critical directory)"
+    yield ""
     # Build a compact table: dir, files_scanned, total_hits
     dist_rows: List[List[str]] = []
     all_dir_keys = sorted(set(summary.dir_files_scanned.keys()) | set(summary.dir_occurrences.keys()) | {"other"})
@@ -102,68 +112,70 @@ def render_markdown(summary: ScanSummary) -> str:
         occ_map = summary.dir_occurrences.get(d, {})
         total_hits = sum(occ_map.values()) if occ_map else 0
         dist_rows.append([f"`{d}`", str(files_scanned), str(total_hits)])
-    lines.append(_md_table(["dir_key", "py_files_scanned", "total_hits"], dist_rows))
-    lines.append("")
+    yield _md_table(["dir_key", "py_files_scanned", "total_hits"], dist_rows)
+    yield ""
 
-    lines.append("### Per-directory category / severity rollups (only partitions with hits)")
-    lines.append("")
+    yield "### Per-directory category / severity rollups (only partitions with hits)"
+    yield ""
     dcs_rows: List[List[str]] = []
     for d in sorted(summary.dir_occurrences.keys()):
         occ_map = summary.dir_occurrences.get(d, {})
         if sum(occ_map.values()) <= 0:
             continue
-        for cat, occ in sorted(summary.dir_category_occurrences.get(d, {}).items(), key=lambda x: (-x[1], x[0])):
+        for cat, occ in _by_count_desc(summary.dir_category_occurrences.get(d, {})):
             if occ <= 0:
                 continue
             dcs_rows.append([f"`{d}`", "category", cat, str(occ)])
-        for sev, occ in sorted(summary.dir_severity_occurrences.get(d, {}).items(), key=lambda x: (-x[1], x[0])):
+        for sev, occ in _by_count_desc(summary.dir_severity_occurrences.get(d, {})):
             if occ <= 0:
                 continue
             dcs_rows.append([f"`{d}`", "severity", sev, str(occ)])
     if dcs_rows:
-        lines.append(_md_table(["dir_key", "dimension", "key", "occurrences"], dcs_rows))
+        yield _md_table(["dir_key", "dimension", "key", "occurrences"], dcs_rows)
     else:
-        lines.append("(No hits.)")
-    lines.append("")
+        yield "(No hits.)"
+    yield ""
 
     # Per-dir per-rule table (only for dirs with hits)
-    lines.append("### Per-directory rule breakdown (only partitions with hits)")
-    lines.append("")
+    yield "### Per-directory rule breakdown (only partitions with hits)"
+    yield ""
     pr_rows: List[List[str]] = []
     for d in sorted(summary.dir_occurrences.keys()):
         occ_map = summary.dir_occurrences.get(d, {})
         total_hits = sum(occ_map.values()) if occ_map else 0
         if total_hits <= 0:
             continue
-        for rid, occ in sorted(occ_map.items(), key=lambda x: (-x[1], x[0])):
+        for rid, occ in _by_count_desc(occ_map):
             if occ <= 0:
                 continue
             pr_rows.append([f"`{d}`", rid, str(occ)])
     if pr_rows:
-        lines.append(_md_table(["dir_key", "rule_id", "occurrences"], pr_rows))
+        yield _md_table(["dir_key", "rule_id", "occurrences"], pr_rows)
     else:
-        lines.append("(No hits.)")
-    lines.append("")
+        yield "(No hits.)"
+    yield ""
 
-    lines.append(
+    yield (
         f"## Top directory hotspots (bucketed by first {summary.hotspot_depth} path segments) (Top {len(summary.top_dirs)})"
     )
-    lines.append("")
+    yield ""
     if summary.top_dirs:
         top_rows: List[List[str]] = []
         for p, hits in summary.top_dirs:
             top_rows.append([f"`{p}`", str(hits)])
-        lines.append(_md_table(["dir_bucket", "total_hits"], top_rows))
+        yield _md_table(["dir_bucket", "total_hits"], top_rows)
     else:
-        lines.append("(No hits.)")
-    lines.append("")
+        yield "(No hits.)"
+    yield ""
 
-    lines.append("## Excluded directory globs (effective list)")
-    lines.append("")
+    yield "## Excluded directory globs (effective list)"
+    yield ""
     for g in summary.excluded_dir_globs:
-        lines.append(f"- `{g}`")
-    lines.append("")
+        yield f"- `{g}`"
+    yield ""
+
 
-    return "\n".join(lines)
+def render_markdown(summary: ScanSummary) -> str:
+    return "\n".join(iter_markdown(summary))
 
 
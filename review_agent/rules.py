@@ -1,19 +1,45 @@
+import functools
+import mmap
 import re
-from typing import List
+from typing import Dict, FrozenSet, List, Pattern, Tuple, Union
 
 from .types import Rule
 
+__all__ = [
+    "CATS",
+    "DESCS",
+    "RIDS",
+    "RID_TO_IDX",
+    "RULE_UNION",
+    "RULE_UNION_NL",
+    "SEVS",
+    "after_newline",
+    "compiled_union",
+    "flat_regexes",
+    "hinted_rules_absent",
+    "minimal_ruleset",
+    "unions_without",
+]
 
-def minimal_ruleset() -> List[Rule]:
-    """
+
+def _build_ruleset() -> List[Rule]:
+    r"""
     Fixed minimal ruleset (low false-positive) for a Python 2.7 legacy codebase.
     Text-only regex scanning; no AST parsing.
+    Regexes stay purely regular (no backreferences) and must match in linear time per line.
+
+    Regexes are implicitly anchored at the first non-blank character of a line (no leading `^`)
+    and are run over whole files in MULTILINE mode, so they must never cross a line break:
+    write `[^\S\n]` instead of `\s` and exclude `\n` from negated character classes.
+
+    Patterns are bytes and run over undecoded file contents, so `\w`/`\b` are ASCII-only
+    (as are Python 2 identifiers).
     """
     rules: List[Rule] = []
 
     # Python 3-only syntax signal: f-strings (including rf/fr combinations).
     #
-    # v2 constraint: only trigger on non-comment, line-start syntax (scanner matches on lstrip() lines).
+    # v2 constraint: only trigger on non-comment, line-start syntax (see compiled_union()).
     rules.append(
         Rule(
             id="PY3_FSTRING",
@@ -21,7 +47,8 @@ def minimal_ruleset() -> List[Rule]:
             severity="high",
             description="Python 3 f-string prefix (f''/f\"\"\", including rf/fr).",
             regexes=[
-                re.compile(r"""(?i)^(?:f|rf|fr)(?:'''|\"\"\"|'|")"""),
+                # Case-insensitivity is scoped to the prefix so the regex can be embedded in compiled_union().
+                re.compile(rb"""(?i:f|rf|fr)(?:'''|\"\"\"|'|")"""),
             ],
         )
     )
@@ -34,7 +61,7 @@ def minimal_ruleset() -> List[Rule]:
             severity="high",
             description="Python 3 async function definition (async def).",
             regexes=[
-                re.compile(r"^async\s+def\b"),
+                re.compile(rb"async[^\S\n]+def\b"),
             ],
         )
     )
@@ -47,7 +74,7 @@ def minimal_ruleset() -> List[Rule]:
             severity="medium",
             description="Potential Python 3 await usage (heuristic).",
             regexes=[
-                re.compile(r"^await\b\s*[\w(]"),
+                re.compile(rb"await\b[^\S\n]*[\w(]"),
             ],
         )
     )
@@ -60,7 +87,7 @@ def minimal_ruleset() -> List[Rule]:
             severity="low",
             description="except ... as e (informational: Python 3-style exception binding).",
             regexes=[
-                re.compile(r"^except\b[^:]*\bas\b\s+[A-Za-z_]\w*\s*:?\s*$"),
+                re.compile(rb"except\b[^:\n]*\bas\b[^\S\n]+[A-Za-z_]\w*[^\S\n]*:?[^\S\n]*$"),
             ],
         )
     )
@@ -75,8 +102,12 @@ def minimal_ruleset() -> List[Rule]:
             regexes=[
                 # Heuristic to avoid matching inside inline comments:
                 # match only before any '#' on the line.
-                re.compile(r"^[^#]*\.encode\s*\("),
+                # The lookahead is a cheap single-character scan that rejects most lines before
+                # the charset loop runs.
+                re.compile(rb"(?=[^\n]*\.encode)[^#\n]*\.encode[^\S\n]*\("),
             ],
+            # The lookahead scans every line; most files never call .encode at all.
+            literal_hints=(b".encode",),
         )
     )
     rules.append(
@@ -86,8 +117,9 @@ def minimal_ruleset() -> List[Rule]:
             severity="low",
             description="Potential unicode/str boundary: .decode(...).",
             regexes=[
-                re.compile(r"^[^#]*\.decode\s*\("),
+                re.compile(rb"(?=[^\n]*\.decode)[^#\n]*\.decode[^\S\n]*\("),
             ],
+            literal_hints=(b".decode",),
         )
     )
 
@@ -101,7 +133,7 @@ def minimal_ruleset() -> List[Rule]:
             severity="high",
             description="Python 3-only keyword: nonlocal (anchored).",
             regexes=[
-                re.compile(r"^nonlocal\b"),
+                re.compile(rb"nonlocal\b"),
             ],
         )
     )
@@ -113,7 +145,9 @@ def minimal_ruleset() -> List[Rule]:
             description="Python 3 exception chaining syntax: raise ... from ... (anchored).",
             regexes=[
                 # Avoid matching 'from' inside inline comments by restricting to pre-# text.
-                re.compile(r"^raise\b[^#]*\bfrom\b[^#]*$"),
+                # The '#' check runs once as a lookahead: `[^#]*\bfrom\b[^#]*$` backtracks over
+                # every 'from' on a long line that ends in a comment (quadratic).
+                re.compile(rb"raise\b(?=[^#\n]*$)[^#\n]*\bfrom\b"),
             ],
         )
     )
@@ -121,3 +155,106 @@ def minimal_ruleset() -> List[Rule]:
     return rules
 
 
+def flat_regexes(rules: List[Rule]) -> List[Tuple[int, Pattern[bytes]]]:
+    """
+    (rule index, regex) pairs in rule order; position n corresponds to group g<n> of compiled_union().
+    """
+    return [(i, rx) for i, r in enumerate(rules) for rx in r.regexes]
+
+
+def compiled_union(rules: List[Rule], skip: FrozenSet[int] = frozenset()) -> Pattern[bytes]:
+    """
+    Combine all rule regexes into one alternation that matches at the start of a line.
+
+    The shared prefix skips leading whitespace and rejects pure comment lines; it is followed by
+    a non-blank character so the engine never retries the alternation at shorter indents.
+    Each regex is wrapped in a named group g<n> (see flat_regexes()); on a match, `lastgroup`
+    names the first regex that matched. Alternation stops at the first matching branch, so
+    callers still need to try the regexes after it when rules can overlap on one line.
+    Rule regexes must use inline (scoped) flags only; compile-time flags are not carried over.
+    Rules whose index is in `skip` are left out; the other groups keep their numbers.
+    """
+    alternation = b"|".join(
+        b"(?P<g%d>%s)" % (n, rx.pattern) for n, (i, rx) in enumerate(flat_regexes(rules)) if i not in skip
+    )
+    if not alternation:
+        alternation = b"(?!)"
+    return re.compile(rb"[ \t\f\v]*(?=[^\s#])(?:" + alternation + b")", re.MULTILINE)
+
+
+def after_newline(union: Pattern[bytes]) -> Pattern[bytes]:
+    """
+    `union` prefixed with a literal newline, for finditer() over a whole file.
+
+    A literal first character lets the regex engine skip straight to line starts; a `^` anchor
+    would be tried at every offset. The first line of a file needs a separate `union.match()`.
+    """
+    return re.compile(b"\n" + union.pattern, union.flags)
+
+
+# Built and compiled once per process; Rule objects are immutable.
+_RULES: Tuple[Rule, ...] = tuple(_build_ruleset())
+
+# Structure-of-arrays view of the ruleset, indexed by rule number (rule order). Hot paths count
+# hits per rule number and only turn them into rule ids when building the summary.
+RIDS: Tuple[str, ...] = tuple(r.id for r in _RULES)
+CATS: Tuple[str, ...] = tuple(r.category for r in _RULES)
+SEVS: Tuple[str, ...] = tuple(r.severity for r in _RULES)
+DESCS: Tuple[str, ...] = tuple(r.description for r in _RULES)
+RID_TO_IDX: Dict[str, int] = {rid: i for i, rid in enumerate(RIDS)}
+
+
+def _hint_rules(rules: Tuple[Rule, ...]) -> Dict[bytes, Tuple[int, ...]]:
+    """
+    literal hint -> numbers of the rules listing it.
+    """
+    out: Dict[bytes, Tuple[int, ...]] = {}
+    for i, r in enumerate(rules):
+        for h in r.literal_hints:
+            out[h] = out.get(h, ()) + (i,)
+    return out
+
+
+# All hints as one alternation (see hinted_rules_absent()).
+_HINT_RULES: Dict[bytes, Tuple[int, ...]] = _hint_rules(_RULES)
+_HINT_SCAN: Pattern[bytes] = re.compile(b"|".join(re.escape(h) for h in _HINT_RULES) or b"(?!)")
+
+
+def hinted_rules_absent(buf: Union[bytes, mmap.mmap]) -> FrozenSet[int]:
+    """
+    Numbers of rules with literal_hints none of which occur in `buf` (such rules cannot match).
+
+    One regex pass finds all hints at once, stopping as soon as every hint has been seen, instead
+    of one substring search per hint. Hints must not overlap (one containing another).
+    """
+    absent = {i for rule_ids in _HINT_RULES.values() for i in rule_ids}
+    pending = set(_HINT_RULES)
+    for m in _HINT_SCAN.finditer(buf):
+        h = m.group()
+        if h in pending:
+            pending.discard(h)
+            absent.difference_update(_HINT_RULES[h])
+            if not pending:
+                break
+    return frozenset(absent)
+
+
+@functools.lru_cache(maxsize=None)
+def unions_without(skip: FrozenSet[int]) -> Tuple[Pattern[bytes], Pattern[bytes]]:
+    """
+    compiled_union() of the fixed ruleset minus the rules in `skip`, and its after_newline() form.
+    Compiled on first use per subset (one per combination of rules with literal_hints).
+    """
+    union = compiled_union(list(_RULES), skip)
+    return union, after_newline(union)
+
+
+# compiled_union() of the full fixed ruleset, and its after_newline() form for whole-file scans.
+RULE_UNION, RULE_UNION_NL = unions_without(frozenset())
+
+
+def minimal_ruleset() -> List[Rule]:
+    """
+    The fixed ruleset (see _build_ruleset()); regexes are compiled once at import.
+    """
+    return list(_RULES)
@@ -1,69 +1,82 @@
-import fnmatch
+import heapq
+import itertools
+import mmap
 import os
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
 import platform
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+import sys
+from typing import Deque, Dict, Iterable, List, Match, Optional, Pattern, Sequence, Tuple, Union
 
 from . import __version__
-from .rules import minimal_ruleset
-from .types import Rule, ScanConfig, ScanSummary
-
-
-def _to_posix_relpath(path: str, root: str) -> str:
-    rel = os.path.relpath(path, root)
-    if rel == ".":
-        return ""
-    return rel.replace(os.sep, "/")
-
-
-def _matches_any_glob(posix_path: str, globs: List[str]) -> bool:
-    # Ensure consistent matching: no leading "./"
-    p = posix_path.lstrip("./")
-    for g in globs:
-        # fnmatch doesn't treat "**/" specially; patterns like "**/.git/**" won't match ".git/...".
-        # To be robust, also try matching without a leading "**/".
-        candidates = [g]
-        if g.startswith("**/"):
-            candidates.append(g[len("**/") :])
-        for gg in candidates:
-            if fnmatch.fnmatch(p, gg):
-                return True
-        # Convenience: allow matching directories without trailing /**
-        if g.endswith("/**"):
-            base = g[:-3]
-            if p == base.strip("/"):
-                return True
-    return False
+from .cache import ScanCache, content_digest
+from .excludes import ExcludeMatcher
+from .rules import (
+    CATS,
+    RIDS,
+    RULE_UNION,
+    RULE_UNION_NL,
+    SEVS,
+    flat_regexes,
+    hinted_rules_absent,
+    minimal_ruleset,
+    unions_without,
+)
+from .types import ScanConfig, ScanSummary
 
 
 def iter_python_files(
-    root: str, exclude_dir_globs: List[str], pruned_dirs_counter: Optional[List[int]] = None
-) -> Iterable[str]:
-    root = os.path.abspath(root)
-    for dirpath, dirnames, filenames in os.walk(root, followlinks=False):
-        rel_dir = _to_posix_relpath(dirpath, root)
-
-        # Prune excluded directories in-place
-        kept: List[str] = []
-        for d in dirnames:
-            sub_abs = os.path.join(dirpath, d)
-            sub_rel = _to_posix_relpath(sub_abs, root)
-            if sub_rel and _matches_any_glob(sub_rel + "/", exclude_dir_globs):
-                if pruned_dirs_counter is not None:
-                    pruned_dirs_counter[0] += 1
-                continue
-            kept.append(d)
-        dirnames[:] = kept
+    root: str,
+    exclude_dir_globs: List[str],
+    pruned_dirs_counter: Optional[List[int]] = None,
+    exclude_matcher: Optional[ExcludeMatcher] = None,
+) -> Iterable[Tuple[str, str]]:
+    """
+    Yield (absolute path, posix path relative to root) for .py files under root, in os.walk()
+    order (top-down, directory listing order).
 
-        # Also skip processing files in excluded dirpath itself
-        if rel_dir and _matches_any_glob(rel_dir + "/", exclude_dir_globs):
+    One os.scandir() per directory; file/dir classification uses the DirEntry's cached type, so no
+    extra stat per entry. Excluded directories are pruned before they are listed and symlinked
+    directories are not followed. Unreadable subdirectories are skipped, but an OSError listing
+    root itself (e.g. FileNotFoundError) propagates.
+    """
+    root = os.path.abspath(root)
+    if exclude_matcher is None:
+        exclude_matcher = ExcludeMatcher(exclude_dir_globs)
+    # Subdirectories are only listed if not excluded, so each is checked by its own name only.
+    prune = exclude_matcher.matches_subdir
+    # (directory, its posix path relative to root with a trailing "/"; "" for root itself):
+    # relative paths are built by concatenation instead of os.path.relpath() per entry.
+    stack: List[Tuple[str, str]] = [(root, "")]
+    while stack:
+        dirpath, rel_prefix = stack.pop()
+        try:
+            with os.scandir(dirpath) as it:
+                entries = list(it)
+        except OSError:
+            if dirpath == root:
+                raise
             continue
 
-        for fn in filenames:
-            if not fn.endswith(".py"):
-                continue
-            yield os.path.join(dirpath, fn)
+        subdirs: List[Tuple[str, str]] = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if prune(rel_prefix, entry.name):
+                    if pruned_dirs_counter is not None:
+                        pruned_dirs_counter[0] += 1
+                    continue
+                if not entry.is_symlink():
+                    subdirs.append((entry.path, rel_prefix + entry.name + "/"))
+            elif entry.name.endswith(".py"):
+                yield entry.path, rel_prefix + entry.name
+        # Reversed, so subdirectories are popped (visited) in listing order.
+        stack.extend(reversed(subdirs))
 
 
 def detect_critical_dirs(root: str, configured: List[str]) -> List[str]:
@@ -90,132 +103,425 @@ def _bucket_dir_for_topn(relpath: str, depth: int) -> str:
     return "/".join(parts[: min(depth, len(parts))])
 
 
-def _critical_key(relpath: str, critical_dirs: List[str]) -> str:
-    for cd in critical_dirs:
-        if relpath == cd or relpath.startswith(cd + "/"):
-            return cd
-    return "other"
+def _critical_pos(relpath: str, positions: Dict[str, int], default: int) -> int:
+    """
+    Position (in config order) of the first critical dir that is relpath or one of its ancestors,
+    else `default`. `positions` maps each critical dir to its position: relpath's few ancestors
+    are looked up instead of testing every critical dir.
+    """
+    best = default
+    end = relpath.find("/")
+    while end >= 0:
+        pos = positions.get(relpath[:end])
+        if pos is not None and pos < best:
+            best = pos
+        end = relpath.find("/", end + 1)
+    pos = positions.get(relpath)
+    if pos is not None and pos < best:
+        best = pos
+    return best
+
+
+# File contents as matched: bytes, or an mmap for large files.
+Buffer = Union[bytes, mmap.mmap]
+
+_BOM = b"\xef\xbb\xbf"
+
+
+def _count_rule_hits(
+    text: Buffer,
+    flat: List[Tuple[int, Pattern[bytes]]],
+    union: Pattern[bytes],
+    union_nl: Pattern[bytes],
+    counts: List[int],
+) -> None:
+    """
+    Add rule hits in `text` to `counts` (indexed by rule number).
+
+    One pass over the whole file instead of a Python loop over lines: `union` matches the first
+    line, `union_nl` (its after_newline() form) every other line. Both match at most once per
+    line, at the first non-blank character of non-comment lines (v2 rule constraint: line-start
+    syntax only). Each regex counts at most once per line.
+
+    `text` is the raw file content; a UTF-8 BOM is skipped.
+    """
+    matches: Iterable[Match[bytes]] = union_nl.finditer(text)
+    first = union.match(text, 3 if text[:3] == _BOM else 0)
+    if first is not None:
+        matches = itertools.chain((first,), matches)
+    for m in matches:
+        group = m.lastgroup
+        n = int(group[1:])
+        counts[flat[n][0]] += 1
+        later = flat[n + 1 :]
+        if not later:
+            continue
+        # Branches before n did not match; later ones may still hit the same line.
+        start = m.start(group)
+        end = text.find(b"\n", start)
+        if end < 0:
+            end = len(text)
+        for i, rx in later:
+            if rx.match(text, start, end) is not None:
+                counts[i] += 1
+
+
+# Rule regexes in union group order; module-level so pool workers build them once on import.
+_FLAT: List[Tuple[int, Pattern[bytes]]] = flat_regexes(minimal_ruleset())
+
+# Process pool sizing: below _PARALLEL_MIN_FILES files the pool is not worth starting; tasks
+# hold _CHUNK_FILES_MIN.._CHUNK_FILES_MAX files.
+_PARALLEL_MIN_FILES = 512
+_CHUNK_FILES_MIN = 32
+_CHUNK_FILES_MAX = 256
+# ProcessPoolExecutor rejects more workers than this on Windows (WaitForMultipleObjects limit).
+_WINDOWS_MAX_WORKERS = 61
+
+# Files at least this large are mmap'ed rather than read.
+_MMAP_MIN_BYTES = 64 * 1024
+
+# In-process scans read files ahead on this many threads, this many files per task.
+_PREFETCH_THREADS = 4
+_PREFETCH_BATCH = 64
+
+# Files with a NUL byte this close to the start are treated as binary and not scanned.
+_BINARY_SNIFF_BYTES = 1024
+
+# Result of _scan_file(): (content digest, per-rule counts), None if the file is unreadable, or
+# SKIPPED if it is too large or binary. (A plain string: it has to survive pickling.)
+SKIPPED = "skipped"
+_FileResult = Union[None, str, Tuple[bytes, Optional[Sequence[int]]]]
+
+# Counts of every file without hits (most files): one shared tuple instead of a list per file,
+# both in the results held until aggregation and in each pickled chunk from a worker.
+_NO_HITS: Tuple[int, ...] = (0,) * len(RIDS)
+
+
+def _scan_buffer(
+    buf: Buffer, with_digest: bool, known_digest: Optional[bytes], max_bytes: int
+) -> _FileResult:
+    # Huge files are nearly always generated (protobuf stubs, vendored bundles).
+    if len(buf) > max_bytes or buf[:_BINARY_SNIFF_BYTES].find(b"\0") >= 0:
+        return SKIPPED
+
+    digest = content_digest(buf) if with_digest else b""
+    if known_digest is not None and digest == known_digest:
+        return digest, None
+
+    # Rules whose literal hints do not occur in the file cannot match: leave them out of the union.
+    skip = hinted_rules_absent(buf)
+    union, union_nl = unions_without(skip) if skip else (RULE_UNION, RULE_UNION_NL)
+
+    # Rules are ASCII bytes patterns: match the raw content, no decoding.
+    counts = [0] * len(RIDS)
+    _count_rule_hits(buf, _FLAT, union, union_nl, counts)
+    return digest, counts if any(counts) else _NO_HITS
+
+
+def _scan_file(
+    abspath: str, with_digest: bool, known_digest: Optional[bytes], max_bytes: int
+) -> _FileResult:
+    """
+    Read one file and count rule hits (indexed by rule number).
+
+    The digest is b"" unless `with_digest`; counts are None (not computed) when the digest equals
+    `known_digest`, i.e. the content is unchanged since it was cached. Files over `max_bytes`
+    or with a NUL byte near the start are SKIPPED.
+    """
+    try:
+        with open(abspath, "rb") as f:
+            if os.fstat(f.fileno()).st_size >= _MMAP_MIN_BYTES:
+                # Large (often generated) files are matched in place instead of copied into bytes.
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return _scan_buffer(mm, with_digest, known_digest, max_bytes)
+            raw = f.read()
+    except (OSError, ValueError):
+        return None
+    return _scan_buffer(raw, with_digest, known_digest, max_bytes)
 
 
-def scan_codebase(config: ScanConfig, config_path: Optional[str]) -> ScanSummary:
-    rules: List[Rule] = minimal_ruleset()
-    rule_ids = [r.id for r in rules]
-    rule_by_id: Dict[str, Rule] = {r.id: r for r in rules}
+def _scan_chunk(
+    work: List[Tuple[str, Optional[bytes]]], with_digest: bool, max_bytes: int
+) -> List[_FileResult]:
+    return [_scan_file(abspath, with_digest, known, max_bytes) for abspath, known in work]
+
+
+def _read_small(abspath: str) -> Optional[bytes]:
+    """
+    Contents of a file below _MMAP_MIN_BYTES; None if it is larger or cannot be read.
+    """
+    try:
+        with open(abspath, "rb") as f:
+            if os.fstat(f.fileno()).st_size >= _MMAP_MIN_BYTES:
+                return None
+            return f.read()
+    except OSError:
+        return None
+
+
+def _read_batch(paths: List[str]) -> List[Optional[bytes]]:
+    return [_read_small(p) for p in paths]
+
+
+def _scan_chunk_prefetched(
+    work: List[Tuple[str, Optional[bytes]]], with_digest: bool, max_bytes: int
+) -> List[_FileResult]:
+    """
+    _scan_chunk() with file reads running ahead on a few threads, so I/O waits (cold page cache)
+    overlap with matching; reads release the GIL. Files are read in batches to keep the
+    per-file thread hand-off cheap when everything is already cached.
+    """
+    batches = [work[i : i + _PREFETCH_BATCH] for i in range(0, len(work), _PREFETCH_BATCH)]
+    if len(batches) < 2:
+        return _scan_chunk(work, with_digest, max_bytes)
+    results: List[_FileResult] = []
+    with ThreadPoolExecutor(max_workers=_PREFETCH_THREADS) as pool:
+        # At most two batches per thread in flight, which bounds the memory held by read-ahead.
+        todo = iter(batches)
+        ahead: Deque[Tuple[List[Tuple[str, Optional[bytes]]], "Future[List[Optional[bytes]]]"]] = deque()
+        for batch in itertools.islice(todo, 2 * _PREFETCH_THREADS):
+            ahead.append((batch, pool.submit(_read_batch, [abspath for abspath, _ in batch])))
+        while ahead:
+            batch, reads = ahead.popleft()
+            nxt = next(todo, None)
+            if nxt is not None:
+                ahead.append((nxt, pool.submit(_read_batch, [abspath for abspath, _ in nxt])))
+            for (abspath, known), raw in zip(batch, reads.result()):
+                if raw is None:
+                    # Large (mmap'ed) or unreadable: _scan_file() maps it or reports the error.
+                    results.append(_scan_file(abspath, with_digest, known, max_bytes))
+                else:
+                    results.append(_scan_buffer(raw, with_digest, known, max_bytes))
+    return results
+
+
+def _default_jobs() -> int:
+    # CPUs this process may run on (e.g. a CPU-limited container), not all CPUs of the host.
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def _scan_files(
+    work: List[Tuple[str, Optional[bytes]]], with_digest: bool, jobs: int, max_bytes: int
+) -> List[_FileResult]:
+    """
+    _scan_file() over (abspath, known digest) pairs, in order; in a process pool when jobs > 1.
+    """
+    if jobs <= 1 or len(work) < _PARALLEL_MIN_FILES:
+        return _scan_chunk_prefetched(work, with_digest, max_bytes)
+    # About 4 tasks per worker, so one slow chunk (e.g. a huge generated file) does not leave
+    # the other workers idle at the end.
+    size = max(_CHUNK_FILES_MIN, min(_CHUNK_FILES_MAX, -(-len(work) // (4 * jobs))))
+    chunks = [work[i : i + size] for i in range(0, len(work), size)]
+    workers = min(jobs, len(chunks))
+    if sys.platform == "win32":
+        workers = min(workers, _WINDOWS_MAX_WORKERS)
+    results: List[_FileResult] = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = pool.map(_scan_chunk, chunks, itertools.repeat(with_digest), itertools.repeat(max_bytes))
+            for part in parts:
+                results.extend(part)
+    except (OSError, NotImplementedError, BrokenProcessPool):
+        # No usable multiprocessing here (e.g. sandboxed, no /dev/shm, no sem_open): scan in
+        # this process.
+        return _scan_chunk_prefetched(work, with_digest, max_bytes)
+    return results
+
+
+def _collect_counts(
+    files: List[Tuple[str, str]], cache: Optional[ScanCache], jobs: int, max_bytes: int
+) -> List[Union[None, str, Sequence[int]]]:
+    """
+    Per-rule hit counts for each (abspath, relpath); None if the file cannot be read, SKIPPED if
+    it is too large or binary.
+
+    Cache lookups stay in this process: files with unchanged (mtime_ns, size) are not read at all,
+    files with unchanged content are read and hashed but not matched. Skipped files are not cached.
+    """
+    results: List[Union[None, str, Sequence[int]]] = [None] * len(files)
+    stats: Dict[int, os.stat_result] = {}
+    todo: List[int] = []
+    work: List[Tuple[str, Optional[bytes]]] = []
+    for idx, (abspath, rel) in enumerate(files):
+        known: Optional[bytes] = None
+        if cache is not None:
+            try:
+                st = os.stat(abspath)
+            except OSError:
+                continue
+            if st.st_size > max_bytes:
+                results[idx] = SKIPPED
+                continue
+            cached = cache.lookup_stat(rel, st.st_mtime_ns, st.st_size)
+            if cached is not None:
+                results[idx] = cached
+                continue
+            stats[idx] = st
+            known = cache.digest(rel)
+        todo.append(idx)
+        work.append((abspath, known))
+
+    for idx, res in zip(todo, _scan_files(work, cache is not None, jobs, max_bytes)):
+        if res is None or res == SKIPPED:
+            results[idx] = res
+            continue
+        digest, counts = res
+        if cache is not None:
+            rel = files[idx][1]
+            if counts is None:
+                counts = cache.lookup_digest(rel, digest)
+            if counts is None:
+                continue
+            st = stats[idx]
+            cache.store(rel, st.st_mtime_ns, st.st_size, digest, counts)
+        results[idx] = counts
+    return results
+
+
+def scan_codebase(
+    config: ScanConfig,
+    config_path: Optional[str],
+    cache: Optional[ScanCache] = None,
+    jobs: Optional[int] = None,
+) -> ScanSummary:
+    """
+    Scan all Python files under config.root. With `cache`, unchanged files are not re-matched;
+    the caller is responsible for cache.save(). Files are matched in up to `jobs` worker
+    processes (default: one per usable CPU); results do not depend on `jobs`.
+    """
+    if jobs is None:
+        jobs = _default_jobs()
+    # Rule numbers index RIDS/CATS/SEVS; counters below are lists indexed the same way.
+    n_rules = len(RIDS)
 
     started = datetime.now(timezone.utc)
 
     critical_detected = detect_critical_dirs(config.root, config.critical_dirs)
     critical_keys_all = list(critical_detected) + ["other"]
-    categories_all = sorted({r.category for r in rules})
+    categories_all = sorted(set(CATS))
     severities_all = ["high", "medium", "low"]
 
+    # Dense counters indexed by number: rule (as RIDS), critical key (as critical_keys_all),
+    # category (as categories_all), severity (as severities_all). Turned back into dicts at the end.
+    key_index = {k: n for n, k in enumerate(critical_keys_all)}
+    # Critical dir position -> key number (the last position is "other").
+    crit_positions: Dict[str, int] = {}
+    for n, d in enumerate(critical_detected):
+        crit_positions.setdefault(d, n)
+    pos_key = [key_index[k] for k in critical_keys_all]
+    rule_cat = [categories_all.index(c) for c in CATS]
+    rule_sev = [severities_all.index(s) for s in SEVS]
+    n_keys = len(critical_keys_all)
+    n_cats = len(categories_all)
+    n_sevs = len(severities_all)
+
     # Aggregations
-    rule_occ: Dict[str, int] = {rid: 0 for rid in rule_ids}
-    rule_files: Dict[str, int] = {rid: 0 for rid in rule_ids}
-    dir_occ: Dict[str, Dict[str, int]] = defaultdict(lambda: {rid: 0 for rid in rule_ids})
-    dir_files_scanned: Dict[str, int] = defaultdict(int)
+    rule_occ: List[int] = [0] * n_rules
+    rule_files: List[int] = [0] * n_rules
+    category_occ: List[int] = [0] * n_cats
+    category_files: List[int] = [0] * n_cats
+    severity_occ: List[int] = [0] * n_sevs
+    severity_files: List[int] = [0] * n_sevs
+    dir_files_scanned: List[int] = [0] * n_keys
+    dir_category_occ: List[List[int]] = [[0] * n_cats for _ in range(n_keys)]
+    dir_severity_occ: List[List[int]] = [[0] * n_sevs for _ in range(n_keys)]
+    # Per-rule rows only for keys with hits; both orders below are first-seen, as in the summary.
+    dir_occ: List[Optional[List[int]]] = [None] * n_keys
+    keys_scanned: List[int] = []
+    keys_hit: List[int] = []
     top_dir_hits: Dict[str, int] = defaultdict(int)
+    # The critical key and the hotspot bucket depend only on a file's directory; files come from
+    # the walker grouped by directory, so each is computed once per directory, not per file.
+    # (Critical dirs are directories, so a file's own path never matches one.)
+    dir_key_cache: Dict[str, int] = {}
+    bucket_cache: Dict[str, str] = {}
 
     scanned_files = 0
     skipped_files = 0
     read_errors = 0
 
-    category_occ: Dict[str, int] = {c: 0 for c in categories_all}
-    severity_occ: Dict[str, int] = {s: 0 for s in severities_all}
-    category_files: Dict[str, int] = {c: 0 for c in categories_all}
-    severity_files: Dict[str, int] = {s: 0 for s in severities_all}
-
-    dir_category_occ: Dict[str, Dict[str, int]] = {
-        k: {c: 0 for c in categories_all} for k in critical_keys_all
-    }
-    dir_severity_occ: Dict[str, Dict[str, int]] = {
-        k: {s: 0 for s in severities_all} for k in critical_keys_all
-    }
-
     pruned_dirs_counter = [0]
-    for abspath in iter_python_files(
-        config.root, config.exclude_dir_globs, pruned_dirs_counter=pruned_dirs_counter
+    files: List[Tuple[str, str]] = []
+    for abspath, rel in iter_python_files(
+        config.root,
+        config.exclude_dir_globs,
+        pruned_dirs_counter=pruned_dirs_counter,
+        exclude_matcher=config.exclude_matcher,
     ):
-        rel = _to_posix_relpath(abspath, config.root)
-
-        # Exclude is already handled at directory-level, but keep a safe check
-        if rel and _matches_any_glob(rel, config.exclude_dir_globs):
+        # Directories are pruned by the walker; this only catches file-level globs.
+        if config.exclude_matcher.matches_file(rel):
             skipped_files += 1
             continue
+        files.append((abspath, rel))
 
+    results = _collect_counts(files, cache, jobs, config.max_file_bytes)
+    for (abspath, rel), per_file_counts in zip(files, results):
+        if per_file_counts == SKIPPED:
+            skipped_files += 1
+            continue
         scanned_files += 1
-        crit_key = _critical_key(rel, critical_detected)
-        dir_files_scanned[crit_key] += 1
-
-        try:
-            with open(abspath, "rb") as f:
-                raw = f.read()
-        except Exception:
+        d = rel.rpartition("/")[0]
+        k = dir_key_cache.get(d)
+        if k is None:
+            k = dir_key_cache[d] = pos_key[_critical_pos(d, crit_positions, len(critical_detected))]
+        if not dir_files_scanned[k]:
+            keys_scanned.append(k)
+        dir_files_scanned[k] += 1
+
+        if per_file_counts is None:
             read_errors += 1
             continue
+        # Most files have no hits at all; any() runs in C and skips the per-rule loop, the
+        # per-file sets and the hotspot bucket (zero-hit buckets never make the top list).
+        if not any(per_file_counts):
+            continue
 
-        # Decode in a tolerant way; regex rules are ASCII-based.
-        text = raw.decode("utf-8", errors="replace")
-        lines = text.splitlines()
-
-        per_file_counts: Dict[str, int] = {rid: 0 for rid in rule_ids}
-
-        for line in lines:
-            stripped = line.lstrip()
-            # Minimal noise reduction: ignore pure comment lines
-            if stripped.startswith("#"):
-                continue
-            # v2 rule constraint: only trigger on non-comment, line-start syntax.
-            # We match against the line with leading whitespace removed; rules are expected
-            # to be anchored (via ^) or used with .match()-like semantics.
-            hay = stripped
-
-            for rule in rules:
-                for rx in rule.regexes:
-                    # Line-start only: count at most once per regex per line.
-                    if rx.match(hay) is None:
-                        continue
-                    per_file_counts[rule.id] += 1
-
-        total_hits_this_file = 0
-        file_categories_hit: Set[str] = set()
-        file_severities_hit: Set[str] = set()
-        for rid in rule_ids:
-            c = per_file_counts[rid]
+        # Per-file lanes (one per category / severity), folded into the totals once per file.
+        file_cats = [0] * n_cats
+        file_sevs = [0] * n_sevs
+        dir_rules = dir_occ[k]
+        if dir_rules is None:
+            dir_rules = dir_occ[k] = [0] * n_rules
+            keys_hit.append(k)
+        for i in range(n_rules):
+            c = per_file_counts[i]
             if c <= 0:
                 continue
-            rule_occ[rid] += c
-            total_hits_this_file += c
-            meta = rule_by_id.get(rid)
-            if meta is not None:
-                category_occ[meta.category] = category_occ.get(meta.category, 0) + c
-                severity_occ[meta.severity] = severity_occ.get(meta.severity, 0) + c
-                file_categories_hit.add(meta.category)
-                file_severities_hit.add(meta.severity)
-                dir_category_occ.setdefault(crit_key, {}).setdefault(meta.category, 0)
-                dir_category_occ[crit_key][meta.category] += c
-                dir_severity_occ.setdefault(crit_key, {}).setdefault(meta.severity, 0)
-                dir_severity_occ[crit_key][meta.severity] += c
-        for rid in rule_ids:
-            if per_file_counts[rid] > 0:
-                rule_files[rid] += 1
-        for c in file_categories_hit:
-            category_files[c] = category_files.get(c, 0) + 1
-        for s in file_severities_hit:
-            severity_files[s] = severity_files.get(s, 0) + 1
-
-        dir_bucket = _bucket_dir_for_topn(rel, depth=config.hotspot_depth)
+            rule_occ[i] += c
+            rule_files[i] += 1
+            dir_rules[i] += c
+            file_cats[rule_cat[i]] += c
+            file_sevs[rule_sev[i]] += c
+        dir_cat = dir_category_occ[k]
+        for cat in range(n_cats):
+            c = file_cats[cat]
+            if c:
+                category_occ[cat] += c
+                category_files[cat] += 1
+                dir_cat[cat] += c
+        dir_sev = dir_severity_occ[k]
+        for sev in range(n_sevs):
+            c = file_sevs[sev]
+            if c:
+                severity_occ[sev] += c
+                severity_files[sev] += 1
+                dir_sev[sev] += c
+        total_hits_this_file = sum(file_sevs)
+
+        dir_bucket = bucket_cache.get(d)
+        if dir_bucket is None:
+            dir_bucket = bucket_cache[d] = _bucket_dir_for_topn(rel, depth=config.hotspot_depth)
         top_dir_hits[dir_bucket] += total_hits_this_file
-        for rid in rule_ids:
-            if per_file_counts[rid] > 0:
-                dir_occ[crit_key][rid] += per_file_counts[rid]
 
     finished = datetime.now(timezone.utc)
 
-    top_dirs_sorted: List[Tuple[str, int]] = sorted(
-        top_dir_hits.items(), key=lambda x: (-x[1], x[0])
+    # Top N buckets by hits (ties by name): a bounded heap over pre-keyed tuples, no full sort.
+    top_dirs_keyed = heapq.nsmallest(
+        config.top_n_dirs, [(-hits, d) for d, hits in top_dir_hits.items() if hits > 0]
     )
-    top_dirs_sorted = [t for t in top_dirs_sorted if t[1] > 0][: config.top_n_dirs]
+    top_dirs_sorted: List[Tuple[str, int]] = [(d, -neg) for neg, d in top_dirs_keyed]
 
     return ScanSummary(
         tool_version=__version__,
@@ -230,19 +536,23 @@ def scan_codebase(config: ScanConfig, config_path: Optional[str]) -> ScanSummary
         read_errors=read_errors,
         top_n_dirs=config.top_n_dirs,
         hotspot_depth=config.hotspot_depth,
-        rule_occurrences=rule_occ,
-        rule_files=rule_files,
-        dir_occurrences=dict(dir_occ),
-        dir_files_scanned=dict(dir_files_scanned),
+        rule_occurrences=dict(zip(RIDS, rule_occ)),
+        rule_files=dict(zip(RIDS, rule_files)),
+        dir_occurrences={critical_keys_all[k]: dict(zip(RIDS, dir_occ[k] or ())) for k in keys_hit},
+        dir_files_scanned={critical_keys_all[k]: dir_files_scanned[k] for k in keys_scanned},
         top_dirs=top_dirs_sorted,
         critical_dirs_detected=critical_detected,
         excluded_dir_globs=list(config.exclude_dir_globs),
-        category_occurrences=dict(category_occ),
-        severity_occurrences=dict(severity_occ),
-        category_files=dict(category_files),
-        severity_files=dict(severity_files),
-        dir_category_occurrences=dict(dir_category_occ),
-        dir_severity_occurrences=dict(dir_severity_occ),
+        category_occurrences=dict(zip(categories_all, category_occ)),
+        severity_occurrences=dict(zip(severities_all, severity_occ)),
+        category_files=dict(zip(categories_all, category_files)),
+        severity_files=dict(zip(severities_all, severity_files)),
+        dir_category_occurrences={
+            key: dict(zip(categories_all, row)) for key, row in zip(critical_keys_all, dir_category_occ)
+        },
+        dir_severity_occurrences={
+            key: dict(zip(severities_all, row)) for key, row in zip(critical_keys_all, dir_severity_occ)
+        },
     )
 
 
@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Pattern, Tuple
 
+from .excludes import ExcludeMatcher
+
 
 @dataclass(frozen=True)
 class Rule:
@@ -10,7 +12,12 @@ class Rule:
     category: str
     severity: str  # high|medium|low
     description: str
-    regexes: List[Pattern[str]]
+    regexes: List[Pattern[bytes]]
+    # If set, the rule can only match files containing one of these byte strings, and its regexes
+    # are left out of the union for other files. Only worth it for regexes that cost time on every
+    # line. All hints of the ruleset are found in one shared pass over the file, and hints must not
+    # overlap (see rules.hinted_rules_absent()).
+    literal_hints: Tuple[bytes, ...] = ()
 
 
 @dataclass
@@ -30,6 +37,20 @@ class ScanConfig:
     critical_dirs: List[str]
     top_n_dirs: int = 15
     hotspot_depth: int = 3
+    # Larger files (typically generated code) are skipped, not scanned.
+    max_file_bytes: int = 2_000_000
+
+    # exclude_dir_globs, pre-split once into set/prefix checks plus a regex (see ExcludeMatcher).
+    exclude_matcher: ExcludeMatcher = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.exclude_matcher = ExcludeMatcher(self.exclude_dir_globs)
+
+    def exclude_match(self, relpath: str) -> bool:
+        """
+        True if the posix path (relative to root; directories with a trailing "/") is excluded.
+        """
+        return self.exclude_matcher.matches(relpath)
 
 
 @dataclass